@@ -0,0 +1,794 @@
+# Static HTML diagrams rendered by app.py. Kept in an imported module so the
+# strings are built once per process rather than on every Streamlit rerun.
+
+# Schema diagram shown on the "Schema Overview" page
+SCHEMA_DIAGRAM_HTML = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <style>
+            body { 
+                margin: 0; 
+                padding: 20px; 
+                background-color: white; 
+                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+                color: #333;
+            }
+            .container { 
+                display: flex; 
+                flex-direction: column; 
+                gap: 30px; 
+                max-width: 1200px; 
+                margin: 0 auto;
+            }
+            .file-section {
+                border: 2px solid #ddd;
+                border-radius: 10px;
+                padding: 20px;
+                background: linear-gradient(135deg, #f8f9fa, #e9ecef);
+            }
+            .file-header {
+                font-size: 18px;
+                font-weight: bold;
+                margin-bottom: 15px;
+                color: #2c3e50;
+                border-bottom: 1px solid #ddd;
+                padding-bottom: 10px;
+            }
+            .entities {
+                display: flex;
+                gap: 15px;
+                flex-wrap: wrap;
+            }
+            .entity {
+                background: white;
+                border: 1px solid #ccc;
+                border-radius: 8px;
+                padding: 12px;
+                min-width: 150px;
+                text-align: center;
+                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+            }
+            .entity-id {
+                font-weight: bold;
+                color: #e67e22;
+                margin-bottom: 5px;
+            }
+            .entity-name {
+                font-size: 12px;
+                color: #666;
+            }
+            .relationships {
+                margin-top: 30px;
+                padding: 20px;
+                background: #f8f9fa;
+                border-radius: 10px;
+                border: 2px solid #6c5ce7;
+            }
+            .relationship-title {
+                font-size: 18px;
+                font-weight: bold;
+                color: #6c5ce7;
+                margin-bottom: 15px;
+            }
+            .relationship-group {
+                margin-bottom: 20px;
+                padding: 15px;
+                background: white;
+                border-radius: 8px;
+                border-left: 4px solid #e74c3c;
+                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+            }
+            .relationship-type {
+                font-weight: bold;
+                color: #e74c3c;
+                margin-bottom: 10px;
+            }
+            .relationship-item {
+                margin: 8px 0;
+                padding: 8px;
+                background: #f8f9fa;
+                border-radius: 5px;
+                font-size: 14px;
+            }
+            .arrow {
+                color: #00b894;
+                font-weight: bold;
+            }
+            .credit-amount {
+                color: #00b894;
+                font-weight: bold;
+            }
+            .file-prime-brokers { border-color: #e74c3c; }
+            .file-customers { border-color: #3498db; }
+            .file-sessions { border-color: #00b894; }
+            .file-credit { border-color: #f39c12; }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <!-- Prime Brokers File -->
+            <div class="file-section file-prime-brokers">
+                <div class="file-header">📁 prime_brokers.yaml</div>
+                <div class="entities">
+                    <div class="entity">
+                        <div class="entity-id">CPB_1</div>
+                        <div class="entity-name">Central Prime Broker One</div>
+                                             <div style="color: #e74c3c; font-size: 12px; margin-top: 5px;">is_central_pb: true</div>
+                    </div>
+                                     <div class="entity">
+                         <div class="entity-id">PB_A</div>
+                         <div class="entity-name">Prime Broker Alpha</div>
+                         <div style="color: #666; font-size: 12px; margin-top: 5px;">is_central_pb: false</div>
+                     </div>
+                                     <div class="entity">
+                         <div class="entity-id">PB_B</div>
+                         <div class="entity-name">Prime Broker Beta</div>
+                         <div style="color: #666; font-size: 12px; margin-top: 5px;">is_central_pb: false</div>
+                     </div>
+                </div>
+            </div>
+
+            <!-- Customers File -->
+            <div class="file-section file-customers">
+                <div class="file-header">📁 customers.yaml</div>
+                <div class="entities">
+                    <div class="entity">
+                        <div class="entity-id">Cust_1</div>
+                        <div class="entity-name">Hedge Fund Gamma</div>
+                    </div>
+                    <div class="entity">
+                        <div class="entity-id">Cust_2</div>
+                        <div class="entity-name">Asset Manager Delta</div>
+                    </div>
+                </div>
+            </div>
+
+            <!-- Sessions File -->
+            <div class="file-section file-sessions">
+                <div class="file-header">📁 sessions.yaml</div>
+                <div class="entities">
+                    <div class="entity">
+                        <div class="entity-id">FIXS_C1_PBA_001</div>
+                        <div class="entity-name">customer_id: Cust_1<br>pb_id: PB_A</div>
+                    </div>
+                    <div class="entity">
+                        <div class="entity-id">FIXS_C1_PBB_001</div>
+                        <div class="entity-name">customer_id: Cust_1<br>pb_id: PB_B</div>
+                    </div>
+                    <div class="entity">
+                        <div class="entity-id">FIXS_C2_PBA_001</div>
+                        <div class="entity-name">customer_id: Cust_2<br>pb_id: PB_A</div>
+                    </div>
+                </div>
+            </div>
+
+            <!-- Credit Data File -->
+            <div class="file-section file-credit">
+                <div class="file-header">📁 credit_data.yaml (Updated by 3rd Party Vendor)</div>
+                <div style="display: flex; gap: 30px;">
+                                     <div style="flex: 1;">
+                         <h4 style="color: #f39c12; margin-bottom: 10px;">customer_pb_limits:</h4>
+                        <div class="entity">
+                            <div style="font-size: 12px;">Cust_1 → PB_A: <span class="credit-amount">$1,000,000</span></div>
+                            <div style="font-size: 12px;">Cust_1 → PB_B: <span class="credit-amount">$500,000</span></div>
+                            <div style="font-size: 12px;">Cust_2 → PB_A: <span class="credit-amount">$2,000,000</span></div>
+                        </div>
+                    </div>
+                                     <div style="flex: 1;">
+                         <h4 style="color: #f39c12; margin-bottom: 10px;">pb_to_central_pb_limits:</h4>
+                        <div class="entity">
+                            <div style="font-size: 12px;">PB_A → CPB_1: <span class="credit-amount">$5,000,000</span></div>
+                            <div style="font-size: 12px;">PB_B → CPB_1: <span class="credit-amount">$3,000,000</span></div>
+                        </div>
+                    </div>
+                </div>
+            </div>
+
+            <!-- Relationships Section -->
+            <div class="relationships">
+                <div class="relationship-title">🔗 Key Relationships & Data Flow</div>
+                
+                <div class="relationship-group">
+                    <div class="relationship-type">1. Customer Session Ownership</div>
+                    <div class="relationship-item">Cust_1 <span class="arrow">owns</span> FIXS_C1_PBA_001, FIXS_C1_PBB_001</div>
+                    <div class="relationship-item">Cust_2 <span class="arrow">owns</span> FIXS_C2_PBA_001</div>
+                </div>
+
+                <div class="relationship-group">
+                    <div class="relationship-type">2. Session-to-Prime Broker Mapping</div>
+                    <div class="relationship-item">FIXS_C1_PBA_001 <span class="arrow">routes to</span> PB_A</div>
+                    <div class="relationship-item">FIXS_C1_PBB_001 <span class="arrow">routes to</span> PB_B</div>
+                    <div class="relationship-item">FIXS_C2_PBA_001 <span class="arrow">routes to</span> PB_A</div>
+                </div>
+
+                <div class="relationship-group">
+                    <div class="relationship-type">3. Credit Limit Hierarchy</div>
+                    <div class="relationship-item">Customer <span class="arrow">has credit limit with</span> Prime Broker</div>
+                    <div class="relationship-item">Prime Broker <span class="arrow">has credit line with</span> Central Prime Broker</div>
+                    <div class="relationship-item">Central Prime Broker <span class="arrow">provides</span> venue access</div>
+                </div>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+# Trade rejection flow shown on the "Trade Rejection Flow/Resolution" page
+TRADE_FLOW_HTML = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <style>
+            body { 
+                margin: 0; 
+                padding: 20px; 
+                background-color: white; 
+                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+                color: #333;
+            }
+            .flow-container { 
+                display: flex; 
+                flex-direction: column; 
+                gap: 20px; 
+                max-width: 1200px; 
+                margin: 0 auto;
+            }
+            .flow-row {
+                display: flex;
+                align-items: center;
+                gap: 15px;
+                justify-content: space-between;
+            }
+            .flow-row.reverse {
+                flex-direction: row-reverse;
+            }
+            .flow-step {
+                display: flex;
+                align-items: center;
+                gap: 15px;
+                padding: 12px;
+                border-radius: 10px;
+                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+                flex: 1;
+                max-width: 280px;
+            }
+            .step-number {
+                background: #007bff;
+                color: white;
+                border-radius: 50%;
+                width: 35px;
+                height: 35px;
+                display: flex;
+                align-items: center;
+                justify-content: center;
+                font-weight: bold;
+                flex-shrink: 0;
+                font-size: 14px;
+            }
+            .step-content {
+                flex: 1;
+            }
+            .step-title {
+                font-weight: bold;
+                margin-bottom: 3px;
+                color: #2c3e50;
+                font-size: 14px;
+            }
+            .step-description {
+                font-size: 11px;
+                color: #666;
+                margin-bottom: 5px;
+            }
+            .step-data {
+                background: #f8f9fa;
+                padding: 6px;
+                border-radius: 4px;
+                font-family: monospace;
+                font-size: 10px;
+                line-height: 1.2;
+            }
+            .arrow-horizontal {
+                font-size: 20px;
+                color: #007bff;
+                flex-shrink: 0;
+            }
+            .arrow-down {
+                font-size: 20px;
+                color: #007bff;
+                margin: 10px 0;
+            }
+            .arrow-down-right {
+                text-align: right;
+                font-size: 20px;
+                color: #007bff;
+                margin: 10px 0;
+                padding-right: 80px;
+            }
+            .arrow-down-left {
+                text-align: left;
+                font-size: 20px;
+                color: #007bff;
+                margin: 10px 0;
+                padding-left: 80px;
+            }
+            .success { background: linear-gradient(135deg, #d4edda, #c3e6cb); }
+            .processing { background: linear-gradient(135deg, #fff3cd, #ffeaa7); }
+            .error { background: linear-gradient(135deg, #f8d7da, #f5c6cb); }
+            .system { background: linear-gradient(135deg, #d1ecf1, #bee5eb); }
+            .communication { background: linear-gradient(135deg, #e2e3e5, #d6d8db); }
+        </style>
+    </head>
+    <body>
+        <div class="flow-container">
+            <!-- Row 1: Left to Right (Steps 1-3) -->
+            <div class="flow-row">
+                <div class="flow-step success">
+                    <div class="step-number">1</div>
+                    <div class="step-content">
+                        <div class="step-title">Customer Submits Trade</div>
+                        <div class="step-description">Customer sends trade order via FIX session</div>
+                        <div class="step-data">
+                            Session: FIXS_C1_PBA_001<br>
+                            Customer: Cust_1<br>
+                            Instrument: EURUSD<br>
+                            Notional: $600,000
+                        </div>
+                    </div>
+                </div>
+                
+                <div class="arrow-horizontal">→</div>
+                
+                <div class="flow-step processing">
+                    <div class="step-number">2</div>
+                    <div class="step-content">
+                        <div class="step-title">ATS Receives Trade</div>
+                        <div class="step-description">Platform receives FIX message and begins validation</div>
+                        <div class="step-data">
+                            Trade ID: TRD_789456<br>
+                            Lookup: Cust_1 → PB_A<br>
+                            Timestamp: 14:30:15Z
+                        </div>
+                    </div>
+                </div>
+                
+                <div class="arrow-horizontal">→</div>
+                
+                <div class="flow-step system">
+                    <div class="step-number">3</div>
+                    <div class="step-content">
+                        <div class="step-title">Credit Limit Lookup</div>
+                        <div class="step-description">Check customer's credit limit with PB</div>
+                        <div class="step-data">
+                            Query: Cust_1 → PB_A<br>
+                            Limit: $1,000,000 USD<br>
+                            Updated: 08:00:00Z
+                        </div>
+                    </div>
+                </div>
+            </div>
+
+            <!-- Down Arrow - positioned at right to follow flow -->
+            <div class="arrow-down-right">↓</div>
+
+            <!-- Row 2: Right to Left (Steps 4-6) -->
+            <div class="flow-row reverse">
+                <div class="flow-step system">
+                    <div class="step-number">4</div>
+                    <div class="step-content">
+                        <div class="step-title">Current Exposure Calculation</div>
+                        <div class="step-description">Calculate current exposure across all positions</div>
+                        <div class="step-data">
+                            GBPUSD: $250,000<br>
+                            USDJPY: $200,000<br>
+                            Total: $450,000<br>
+                            Available: $550,000
+                        </div>
+                    </div>
+                </div>
+                
+                <div class="arrow-horizontal">←</div>
+                
+                <div class="flow-step error">
+                    <div class="step-number">5</div>
+                    <div class="step-content">
+                        <div class="step-title">Credit Limit Breach Detected</div>
+                        <div class="step-description">New trade would exceed credit limit</div>
+                        <div class="step-data">
+                            New: $600,000<br>
+                            Current: $450,000<br>
+                            Total: $1,050,000<br>
+                            <strong style="color: #dc3545;">BREACH: $50,000</strong>
+                        </div>
+                    </div>
+                </div>
+                
+                <div class="arrow-horizontal">←</div>
+                
+                <div class="flow-step error">
+                    <div class="step-number">6</div>
+                    <div class="step-content">
+                        <div class="step-title">Trade Rejection</div>
+                        <div class="step-description">ATS rejects trade and sends rejection</div>
+                        <div class="step-data">
+                            FIX: ExecutionReport<br>
+                            ExecType: Rejected (8)<br>
+                            Reason: Credit exceeded<br>
+                            Available: $550,000
+                        </div>
+                    </div>
+                </div>
+            </div>
+
+            <!-- Down Arrow - positioned at left to follow flow -->
+            <div class="arrow-down-left">↓</div>
+
+            <!-- Row 3: Left to Right (Steps 7-8) -->
+            <div class="flow-row">
+                <div class="flow-step communication">
+                    <div class="step-number">7</div>
+                    <div class="step-content">
+                        <div class="step-title">Alert & Notification</div>
+                        <div class="step-description">Trigger alerts and begin communication</div>
+                        <div class="step-data">
+                            • Internal alert to ops team<br>
+                            • Customer notification<br>
+                            • PB notification<br>
+                            • Audit log entry
+                        </div>
+                    </div>
+                </div>
+                
+                <div class="arrow-horizontal">→</div>
+                
+                <div class="flow-step processing">
+                    <div class="step-number">8</div>
+                    <div class="step-content">
+                        <div class="step-title">Resolution Process Begins</div>
+                        <div class="step-description">Coordinate with customer and PB to resolve</div>
+                        <div class="step-data">
+                            Options:<br>
+                            • Temporary credit increase<br>
+                            • Reduce positions<br>
+                            • Split trade
+                        </div>
+                    </div>
+                </div>
+                
+                <!-- Empty space to balance the row -->
+                <div style="flex: 1; max-width: 280px;"></div>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+# Relationship network shown on the "Trading Simulation" page. A str.format template
+# (literal braces doubled): fill in customers, prime_brokers and sessions as JSON.
+RELATIONSHIP_DIAGRAM_TEMPLATE = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <style>
+            body {{ 
+                margin: 0; 
+                padding: 20px; 
+                background: white; 
+                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+            }}
+            #network {{ 
+                width: 100%; 
+                height: 700px; 
+                border: 1px solid #ddd; 
+                border-radius: 8px;
+                background: #fafafa;
+            }}
+            .legend {{
+                position: absolute;
+                top: 20px;
+                right: 20px;
+                background: rgba(255,255,255,0.95);
+                padding: 15px;
+                border-radius: 8px;
+                border: 1px solid #ddd;
+                font-size: 12px;
+                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+            }}
+            .legend-item {{
+                display: flex;
+                align-items: center;
+                margin: 8px 0;
+            }}
+            .legend-color {{
+                width: 16px;
+                height: 16px;
+                margin-right: 8px;
+                border-radius: 50%;
+                border: 1px solid #ccc;
+            }}
+            .tooltip {{
+                position: absolute;
+                background: rgba(0,0,0,0.8);
+                color: white;
+                padding: 8px;
+                border-radius: 4px;
+                font-size: 12px;
+                pointer-events: none;
+                z-index: 1000;
+            }}
+            .link {{
+                stroke: #95a5a6;
+                stroke-width: 2;
+                stroke-opacity: 0.7;
+            }}
+            .link.pb-central {{
+                stroke: #e67e22;
+                stroke-width: 3;
+            }}
+            .node-label {{
+                font-size: 11px;
+                font-weight: bold;
+                text-anchor: middle;
+                fill: #333;
+                pointer-events: none;
+            }}
+        </style>
+    </head>
+    <body>
+        <div style="position: relative;">
+            <svg id="network"></svg>
+            <div class="legend">
+                <div style="font-weight: bold; margin-bottom: 10px;">Network Legend</div>
+                <div class="legend-item">
+                    <div class="legend-color" style="background: #e74c3c;"></div>
+                    <span>Customers</span>
+                </div>
+                <div class="legend-item">
+                    <div class="legend-color" style="background: #3498db;"></div>
+                    <span>Prime Brokers</span>
+                </div>
+                <div class="legend-item">
+                    <div class="legend-color" style="background: #f39c12;"></div>
+                    <span>Central PB</span>
+                </div>
+                <div class="legend-item">
+                    <div class="legend-color" style="background: #27ae60;"></div>
+                    <span>Sessions</span>
+                </div>
+            </div>
+        </div>
+        
+        <script src="https://d3js.org/d3.v7.min.js"></script>
+        <script>
+            // Data from configuration
+            const customers = {customers};
+            const primeBrokers = {prime_brokers};
+            const sessions = {sessions};
+            
+            // Set up SVG
+            const width = 1000;
+            const height = 700;
+            const svg = d3.select("#network")
+                .attr("width", width)
+                .attr("height", height);
+            
+            // Tooltip, created on the first hover
+            let tooltipDiv = null;
+            function tooltip() {{
+                if (!tooltipDiv) {{
+                    tooltipDiv = d3.select("body").append("div")
+                        .attr("class", "tooltip")
+                        .style("opacity", 0);
+                }}
+                return tooltipDiv;
+            }}
+            
+            // Node radius by type, at rest and while hovered
+            const RADIUS = {{customer: 20, central_pb: 25, pb: 22, session: 15}};
+            const RADIUS_HOVER = {{customer: 24, central_pb: 30, pb: 26, session: 18}};
+            
+            // Prepare nodes and links
+            const nodes = [];
+            const links = [];
+            
+            // Add customer nodes
+            customers.forEach((customer, i) => {{
+                nodes.push({{
+                    id: customer.id,
+                    name: customer.name,
+                    type: 'customer',
+                    x: 150,
+                    y: 100 + i * 80,
+                    color: '#e74c3c'
+                }});
+            }});
+            
+            // Add prime broker nodes
+            primeBrokers.forEach((pb, i) => {{
+                const x = pb.is_central_pb ? 750 : 500;
+                nodes.push({{
+                    id: pb.id,
+                    name: pb.name,
+                    type: pb.is_central_pb ? 'central_pb' : 'pb',
+                    x: x,
+                    y: 100 + i * 100,
+                    color: pb.is_central_pb ? '#f39c12' : '#3498db'
+                }});
+            }});
+            
+            // Add session nodes and create links
+            sessions.forEach((session, i) => {{
+                const customerNode = nodes.find(n => n.id === session.customer_id);
+                const pbNode = nodes.find(n => n.id === session.pb_id);
+                
+                if (customerNode && pbNode) {{
+                    // Add session node
+                    const sessionNode = {{
+                        id: session.session_id,
+                        customer_id: session.customer_id,
+                        pb_id: session.pb_id,
+                        type: 'session',
+                        x: (customerNode.x + pbNode.x) / 2,
+                        y: (customerNode.y + pbNode.y) / 2 + (i % 3 - 1) * 30,
+                        color: '#27ae60'
+                    }};
+                    nodes.push(sessionNode);
+                    
+                    // Add links
+                    links.push({{
+                        source: customerNode.id,
+                        target: sessionNode.id,
+                        type: 'customer-session'
+                    }});
+                    links.push({{
+                        source: sessionNode.id,
+                        target: pbNode.id,
+                        type: 'session-pb'
+                    }});
+                }}
+            }});
+            
+            // Add PB to Central PB links
+            primeBrokers.forEach(pb => {{
+                if (!pb.is_central_pb) {{
+                    const centralPb = primeBrokers.find(p => p.is_central_pb);
+                    if (centralPb) {{
+                        links.push({{
+                            source: pb.id,
+                            target: centralPb.id,
+                            type: 'pb-central'
+                        }});
+                    }}
+                }}
+            }});
+            
+            // Row of each customer and PB in its column, for the y-force targets
+            const customerIdx = new Map(customers.map((c, i) => [c.id, i]));
+            const pbIdx = new Map(primeBrokers.map((p, i) => [p.id, i]));
+            
+            // Tooltip text is fixed per node, so build it once rather than on every hover
+            nodes.forEach(d => {{
+                d.tooltipHtml = `<strong>${{d.type.toUpperCase()}}</strong><br/>ID: ${{d.id}}<br/>`
+                    + (d.name ? `Name: ${{d.name}}<br/>` : '')
+                    + (d.customer_id ? `Customer: ${{d.customer_id}}<br/>` : '')
+                    + (d.pb_id ? `PB: ${{d.pb_id}}` : '');
+            }});
+            
+            // Create force simulation
+            const simulation = d3.forceSimulation(nodes)
+                .force("link", d3.forceLink(links).id(d => d.id).distance(100))
+                .force("charge", d3.forceManyBody().strength(-300))
+                .force("center", d3.forceCenter(width / 2, height / 2))
+                .force("x", d3.forceX().x(d => {{
+                    if (d.type === 'customer') return 150;
+                    if (d.type === 'central_pb') return 750;
+                    if (d.type === 'pb') return 500;
+                    return width / 2;
+                }}).strength(0.3))
+                .force("y", d3.forceY().y(d => {{
+                    if (d.type === 'customer') return 100 + customerIdx.get(d.id) * 80;
+                    if (d.type === 'pb' || d.type === 'central_pb') return 100 + pbIdx.get(d.id) * 100;
+                    return height / 2;
+                }}).strength(0.3))
+                .stop();
+            
+            // Settle the layout before drawing: run the simulation to rest off-screen,
+            // so the diagram is rendered once at its final positions instead of per tick
+            simulation.tick(Math.ceil(Math.log(simulation.alphaMin()) / Math.log(1 - simulation.alphaDecay())));
+            // After a drag, cool faster and stop once the layout is close to rest
+            // rather than easing out to the defaults
+            simulation.alphaDecay(0.05).alphaMin(0.01);
+            
+            // Create links (styled by the .link CSS rules for their type)
+            const link = svg.append("g")
+                .selectAll("line")
+                .data(links)
+                .enter().append("line")
+                .attr("class", d => `link ${{d.type}}`);
+            
+            // Create nodes
+            const nodeLayer = svg.append("g");
+            const node = nodeLayer
+                .selectAll("g")
+                .data(nodes)
+                .enter().append("g")
+                .call(d3.drag()
+                    .on("start", dragstarted)
+                    .on("drag", dragged)
+                    .on("end", dragended));
+            
+            // Add circles for nodes
+            node.append("circle")
+                .attr("r", d => RADIUS[d.type])
+                .attr("fill", d => d.color)
+                .attr("stroke", "#fff")
+                .attr("stroke-width", 2);
+            
+            // Tooltip and hover radius: one pair of handlers on the node layer, not a pair per circle
+            nodeLayer
+                .on("mouseover", event => {{
+                    if (event.target.tagName !== "circle") return;
+                    const d = event.target.__data__;
+                    tooltip().transition().duration(200).style("opacity", .9);
+                    tooltip().html(d.tooltipHtml)
+                    .style("left", (event.pageX + 10) + "px")
+                    .style("top", (event.pageY - 28) + "px");
+                    
+                    event.target.setAttribute("r", RADIUS_HOVER[d.type]);
+                }})
+                .on("mouseout", event => {{
+                    if (event.target.tagName !== "circle") return;
+                    tooltip().transition().duration(500).style("opacity", 0);
+                    event.target.setAttribute("r", RADIUS[event.target.__data__.type]);
+                }});
+            
+            // Add labels
+            node.append("text")
+                .attr("class", "node-label")
+                .attr("dy", ".35em")
+                .text(d => d.id)
+                .style("font-size", d => d.type === 'session' ? "9px" : "11px");
+            
+            // Draw at the settled positions; the simulation only ticks again while a node is dragged
+            // (plain loops over the elements, in data order, so redraws skip the d3 selection machinery)
+            const linkElements = link.nodes();
+            const nodeElements = node.nodes();
+            function render() {{
+                for (let i = 0; i < links.length; i++) {{
+                    const d = links[i], el = linkElements[i];
+                    el.setAttribute("x1", d.source.x);
+                    el.setAttribute("y1", d.source.y);
+                    el.setAttribute("x2", d.target.x);
+                    el.setAttribute("y2", d.target.y);
+                }}
+                
+                for (let i = 0; i < nodes.length; i++) {{
+                    nodeElements[i].setAttribute("transform", `translate(${{nodes[i].x}},${{nodes[i].y}})`);
+                }}
+            }}
+            render();
+            simulation.on("tick", render);
+            
+            // Drag functions
+            function dragstarted(event, d) {{
+                // Reheat to at least the drag target: after the settle alpha sits below alphaMin,
+                // and the timer would stop after a single tick
+                if (!event.active) simulation.alphaTarget(0.3).alpha(Math.max(simulation.alpha(), 0.3)).restart();
+                d.fx = d.x;
+                d.fy = d.y;
+            }}
+            
+            function dragged(event, d) {{
+                d.fx = event.x;
+                d.fy = event.y;
+            }}
+            
+            function dragended(event, d) {{
+                if (!event.active) simulation.alphaTarget(0);
+                d.fx = null;
+                d.fy = null;
+            }}
+        </script>
+    </body>
+    </html>
+    """
@@ -0,0 +1,35 @@
+# Static page styling and table layouts used by app.py. Kept in an imported module
+# so they are built once per process rather than on every Streamlit rerun.
+
+import streamlit as st
+
+# Narrows the "wide" page layout a little and sizes the Current Positions utilization bars
+PAGE_CSS = """
+<style>
+    .main .block-container {
+        max-width: 1200px;
+        padding-left: 2rem;
+        padding-right: 2rem;
+    }
+    .utilization-card progress {
+        width: 100%;
+    }
+</style>
+"""
+
+# Order Book table columns and their display settings
+ORDER_BOOK_COLUMNS = [
+    'Status', 'Trade ID', 'Time', 'Customer', 'PB', 'Side', 'Instrument', 'Notional', 'Reject Reason'
+]
+
+ORDER_BOOK_COLUMN_CONFIG = {
+    "Status": st.column_config.TextColumn("Status", width="small"),
+    "Trade ID": st.column_config.TextColumn("Trade ID", width="medium"),
+    "Time": st.column_config.TextColumn("Time", width="small"),
+    "Customer": st.column_config.TextColumn("Customer", width="small"),
+    "PB": st.column_config.TextColumn("PB", width="small"),
+    "Side": st.column_config.TextColumn("Side", width="small"),
+    "Instrument": st.column_config.TextColumn("Instrument", width="small"),
+    "Notional": st.column_config.TextColumn("Notional", width="medium"),
+    "Reject Reason": st.column_config.TextColumn("Reject Reason", width="large")
+}
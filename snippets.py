@@ -0,0 +1,618 @@
+# Example code shown in st.code() blocks by app.py. Kept in an imported module so
+# the strings are built once per process rather than on every Streamlit rerun.
+
+# Interactive Examples: 1 - Session to Prime Broker Lookup
+GET_PB_FOR_SESSION_CODE = """
+def get_pb_for_session(session_id, sessions_data):
+    \"\"\"Find the Prime Broker ID for a given session\"\"\"
+    for session in sessions_data:
+        if session['session_id'] == session_id:
+            return session['pb_id']
+    return None
+
+# Usage example
+pb_id = get_pb_for_session('FIXS_C1_PBA_001', sessions)
+print(f"Prime Broker: {pb_id}")
+        """
+
+# Interactive Examples: 2 - Customer Credit Limits Query
+GET_CUSTOMER_CREDIT_LIMITS_CODE = """
+def get_customer_credit_limits(customer_id, credit_data):
+    \"\"\"Get all credit limits for a customer\"\"\"
+    limits = []
+    for limit in credit_data['customer_pb_limits']:
+        if limit['customer_id'] == customer_id:
+            limits.append({
+                'pb_id': limit['pb_id'],
+                'amount': limit['limit_amount'],
+                'currency': limit['currency'],
+                'last_updated': limit['last_updated']
+            })
+    return limits
+
+# Usage example
+limits = get_customer_credit_limits('Cust_1', credit_data)
+total = sum(limit['amount'] for limit in limits)
+print(f"Total credit: ${total:,}")
+        """
+
+# Interactive Examples: 3 - Credit Exposure Check
+VALIDATE_PB_CREDIT_EXPOSURE_CODE = """
+def index_pb_credit_lines(credit_data):
+    \"\"\"Map each non-central PB to its credit line with the central PB (build once at load)\"\"\"
+    pb_credit_lines = {}
+    for limit in credit_data['pb_to_central_pb_limits']:
+        # A PB listed twice keeps its first credit line
+        pb_credit_lines.setdefault(limit['non_central_pb_id'], limit['limit_amount'])
+    return pb_credit_lines
+
+def validate_pb_credit_exposure(pb_id, credit_data, pb_credit_lines):
+    \"\"\"Validate PB credit exposure vs central PB limit\"\"\"
+    # Get total credit issued to customers
+    total_issued = 0
+    for limit in credit_data['customer_pb_limits']:
+        if limit['pb_id'] == pb_id:
+            total_issued += limit['limit_amount']
+    
+    # Get PB's credit line with central PB
+    pb_credit_line = pb_credit_lines.get(pb_id, 0)
+    
+    return {
+        'total_issued': total_issued,
+        'credit_line': pb_credit_line,
+        'is_valid': total_issued <= pb_credit_line,
+        'utilization': (total_issued / pb_credit_line * 100) 
+                      if pb_credit_line > 0 else 0
+    }
+
+# Usage example
+pb_credit_lines = index_pb_credit_lines(credit_data)
+result = validate_pb_credit_exposure('PB_A', credit_data, pb_credit_lines)
+print(f"Valid: {result['is_valid']}")
+print(f"Utilization: {result['utilization']:.1f}%")
+        """
+
+# Error Handling: 1 - Basic File Validation
+LOAD_AND_VALIDATE_YAML_CODE = """
+import os
+import yaml
+
+# Use the libyaml C parser when PyYAML was built with it
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+def load_and_validate_yaml(filename, required_fields):
+    \"\"\"Safely load YAML with validation\"\"\"
+    try:
+        # Check file exists
+        if not os.path.exists(filename):
+            raise FileNotFoundError(f"Configuration file not found: {filename}")
+        
+        # Load YAML
+        with open(filename, 'r') as file:
+            data = yaml.load(file, Loader=YAML_LOADER)
+        
+        # Check not empty
+        if not data:
+            raise ValueError(f"File {filename} is empty or contains no valid data")
+        
+        # Check required fields
+        for field in required_fields:
+            if field not in data:
+                raise ValueError(f"Required field '{field}' missing in {filename}")
+        
+        return data
+        
+    except yaml.YAMLError as e:
+        raise ValueError(f"Invalid YAML syntax in {filename}: {e}")
+    except Exception as e:
+        raise RuntimeError(f"Failed to load {filename}: {e}")
+
+# Usage
+try:
+    prime_brokers = load_and_validate_yaml('prime_brokers.yaml', ['PB_A', 'CPB_1'])
+    print("Prime brokers loaded successfully")
+except Exception as e:
+    print(f"Error: {e}")
+        """
+
+# Error Handling: 2 - Business Rule Checks
+VALIDATE_BUSINESS_RULES_CODE = """
+from collections import Counter
+
+def find_duplicates(ids):
+    \"\"\"Return the IDs that appear more than once, in a single pass\"\"\"
+    return [id_ for id_, count in Counter(ids).items() if count > 1]
+
+def iter_limit_errors(limits, valid_customers, valid_pbs):
+    \"\"\"Yield an error for each credit limit that references an unknown entity\"\"\"
+    for limit in limits:
+        customer_id, pb_id = limit['customer_id'], limit['pb_id']
+        if customer_id not in valid_customers:
+            yield f"Credit limit references unknown customer {customer_id}"
+        if pb_id not in valid_pbs:
+            yield f"Credit limit references unknown PB {pb_id}"
+
+def validate_business_rules(prime_brokers, customers, sessions, credit_data, fail_fast=False):
+    \"\"\"Validate critical business rules (fail_fast stops at the first problem found)\"\"\"
+    errors = []
+    
+    # Build the sets of valid IDs once for all reference checks
+    valid_customers = frozenset(customers)
+    valid_pbs = frozenset(prime_brokers)
+    
+    # Check exactly one central PB
+    central_pbs = [pb for pb in prime_brokers.values() 
+                   if pb.get('is_central_pb', False)]
+    if len(central_pbs) != 1:
+        errors.append(f"Must have exactly 1 central PB, found {len(central_pbs)}")
+    
+    # Check for duplicate IDs, reporting which IDs collide
+    duplicate_pb_ids = find_duplicates(prime_brokers.keys())
+    if duplicate_pb_ids:
+        errors.append(f"Duplicate prime broker IDs found: {duplicate_pb_ids}")
+    
+    duplicate_session_ids = find_duplicates(s['session_id'] for s in sessions['sessions'])
+    if duplicate_session_ids:
+        errors.append(f"Duplicate session IDs found: {duplicate_session_ids}")
+    
+    # Check referential integrity - sessions reference valid entities
+    for session in sessions['sessions']:
+        customer_id, pb_id = session['customer_id'], session['pb_id']
+        if customer_id not in valid_customers:
+            errors.append(f"Session {session['session_id']} references unknown customer {customer_id}")
+        if pb_id not in valid_pbs:
+            errors.append(f"Session {session['session_id']} references unknown PB {pb_id}")
+    
+    if fail_fast and errors:
+        return errors[:1]
+    
+    # Check credit limits reference valid entities - the largest table, so in
+    # fail-fast mode stop walking it at the first bad reference
+    limit_errors = iter_limit_errors(credit_data['customer_pb_limits'], valid_customers, valid_pbs)
+    if fail_fast:
+        first_error = next(limit_errors, None)
+        return [first_error] if first_error else []
+    errors.extend(limit_errors)
+    
+    return errors
+
+# Usage
+errors = validate_business_rules(prime_brokers, customers, sessions, credit_data)
+if errors:
+    for error in errors:
+        print(f"VALIDATION ERROR: {error}")
+else:
+    print("All business rules validated successfully")
+
+# CI-style check that only needs a pass/fail answer
+is_valid = not validate_business_rules(prime_brokers, customers, sessions, credit_data, fail_fast=True)
+        """
+
+# Error Handling: 3 - Credit Exposure Check
+VALIDATE_CREDIT_EXPOSURE_CODE = """
+import pandas as pd
+
+def validate_credit_exposure(credit_data, warning_threshold=0.9):
+    \"\"\"Check PB credit exposure vs central PB limits\"\"\"
+    limits = pd.DataFrame(credit_data['customer_pb_limits'], columns=['pb_id', 'limit_amount'])
+    limits['pb_id'] = limits['pb_id'].astype('category')
+    
+    # Calculate total credit issued by each PB (one groupby over the amount column)
+    pb_issued = limits.groupby('pb_id', sort=False, observed=True)['limit_amount'].sum()
+    pb_issued.index = pb_issued.index.astype(object)
+    
+    # Line up each PB credit line with what that PB has issued
+    lines = pd.DataFrame(credit_data['pb_to_central_pb_limits'],
+                         columns=['non_central_pb_id', 'limit_amount'])
+    issued = lines['non_central_pb_id'].map(pb_issued).fillna(0).astype('int64')
+    credit_line = lines['limit_amount']
+    utilization = (issued / credit_line).where(credit_line > 0, 0.0)
+    
+    # Check against PB credit lines
+    breach = issued > credit_line
+    warning = ~breach & (utilization > warning_threshold)
+    
+    issues = []
+    for i in lines.index[breach | warning]:
+        pb_id, total_issued, pb_credit_line = lines.at[i, 'non_central_pb_id'], int(issued[i]), int(credit_line[i])
+        if breach[i]:
+            issues.append({
+                'type': 'BREACH',
+                'pb_id': pb_id,
+                'issued': total_issued,
+                'limit': pb_credit_line,
+                'excess': total_issued - pb_credit_line
+            })
+        else:
+            issues.append({
+                'type': 'WARNING',
+                'pb_id': pb_id,
+                'utilization': float(utilization[i]) * 100,
+                'issued': total_issued,
+                'limit': pb_credit_line
+            })
+    
+    return issues
+
+# Usage
+issues = validate_credit_exposure(credit_data)
+for issue in issues:
+    if issue['type'] == 'BREACH':
+        print(f"CRITICAL: PB {issue['pb_id']} exceeded limit by ${issue['excess']:,}")
+    else:
+        print(f"WARNING: PB {issue['pb_id']} at {issue['utilization']:.1f}% utilization")
+        """
+
+# Error Handling: 4 - Common Edge Cases
+CHECK_EDGE_CASES_CODE = """
+import pandas as pd
+
+def check_edge_cases(customers, sessions, credit_data, max_age_hours=24):
+    \"\"\"Check for common edge cases and data quality issues\"\"\"
+    warnings = []
+    
+    # Check for customers with multiple sessions - count sessions per customer in one
+    # groupby and only list the sessions of customers with more than one
+    session_frame = pd.DataFrame(sessions['sessions'], columns=['session_id', 'customer_id'])
+    sessions_by_customer = session_frame.groupby('customer_id', sort=False)['session_id']
+    session_counts = sessions_by_customer.size()
+    
+    for customer_id in session_counts.index[session_counts > 1]:
+        session_list = sessions_by_customer.get_group(customer_id).tolist()
+        warnings.append(f"Customer {customer_id} has {len(session_list)} sessions: {session_list}")
+    
+    # Check for customers with sessions but no credit limits
+    customers_with_sessions = set(s['customer_id'] for s in sessions['sessions'])
+    customers_with_credit = set(l['customer_id'] for l in credit_data['customer_pb_limits'])
+    
+    missing_credit = customers_with_sessions - customers_with_credit
+    for customer_id in missing_credit:
+        warnings.append(f"Customer {customer_id} has sessions but no credit limits")
+    
+    # Check for stale credit data - parse every timestamp in one vectorized call,
+    # missing or malformed timestamps come back as NaT instead of raising
+    # (format='ISO8601' needs pandas >= 2.0)
+    limits = credit_data['customer_pb_limits']
+    last_updated = pd.to_datetime(
+        pd.Series([limit.get('last_updated') for limit in limits], dtype=object),
+        format='ISO8601', errors='coerce', utc=True
+    )
+    age_hours = (pd.Timestamp.now(tz='UTC') - last_updated).dt.total_seconds() / 3600
+    invalid_mask = last_updated.isna()
+    stale_mask = age_hours > max_age_hours
+    
+    flagged = invalid_mask | stale_mask
+    for i in flagged[flagged].index:
+        limit = limits[i]
+        if invalid_mask[i]:
+            warnings.append(f"Invalid timestamp for {limit['customer_id']} → {limit['pb_id']}")
+        else:
+            warnings.append(f"Stale credit data for {limit['customer_id']} → {limit['pb_id']} (age: {age_hours[i]:.1f}h)")
+    
+    return warnings
+
+# Usage
+warnings = check_edge_cases(customers, sessions, credit_data)
+for warning in warnings:
+    print(f"EDGE CASE: {warning}")
+        """
+
+# Future Extensibility: Conditional Credit Rules Engine
+CREDIT_RULE_CODE = """
+# Example: Vendor-submitted credit rule in JSON format
+credit_rule = {
+    "rule_id": "VENDOR_A_VOLATILITY_RULE_001",
+    "vendor_id": "CreditVendor_A",
+    "customer_id": "Cust_1",
+    "pb_id": "PB_A",
+    "base_limit": 1000000,
+    "conditions": {
+        "AND": [
+            {"market_volatility": {"EURUSD": {"<": 0.15}}},
+            {"time_of_day": {"between": ["08:00", "17:00"]}},
+            {"customer_pnl_30d": {">": -50000}}
+        ]
+    },
+    "adjustments": {
+        "if_true": {"multiply": 1.2},  # Increase limit by 20%
+        "if_false": {"multiply": 0.8}  # Decrease limit by 20%
+    }
+}
+
+def evaluate_credit_rule(rule, market_data, customer_metrics):
+    \"\"\"Evaluate a vendor credit rule against current conditions\"\"\"
+    base_limit = rule["base_limit"]
+    
+    # Evaluate conditions
+    conditions_met = evaluate_conditions(rule["conditions"], market_data, customer_metrics)
+    
+    # Apply adjustments
+    if conditions_met:
+        adjusted_limit = base_limit * rule["adjustments"]["if_true"]["multiply"]
+    else:
+        adjusted_limit = base_limit * rule["adjustments"]["if_false"]["multiply"]
+    
+    return {
+        "rule_id": rule["rule_id"],
+        "vendor_id": rule["vendor_id"],
+        "original_limit": base_limit,
+        "adjusted_limit": int(adjusted_limit),
+        "conditions_met": conditions_met,
+        "timestamp": datetime.now().isoformat()
+    }
+
+# Usage example
+market_data = {"EURUSD_volatility": 0.12}
+customer_metrics = {"pnl_30d": -25000}
+
+result = evaluate_credit_rule(credit_rule, market_data, customer_metrics)
+print(f"Adjusted limit: ${result['adjusted_limit']:,}")
+        """
+
+# Future Extensibility: Dynamic Credit Updates via API
+CREDIT_API_CODE = """
+from flask import Flask, request, jsonify
+import json
+import requests
+from datetime import datetime
+
+app = Flask(__name__)
+
+@app.route('/api/credit/update', methods=['POST'])
+def update_credit_limit():
+    \"\"\"API endpoint to update credit limits in real-time\"\"\"
+    try:
+        data = request.json
+        
+        # Validate required fields
+        required_fields = ['customer_id', 'pb_id', 'new_limit', 'vendor_id', 'reason']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({"error": f"Missing required field: {field}"}), 400
+        
+        # Create audit record
+        audit_record = {
+            "timestamp": datetime.now().isoformat(),
+            "customer_id": data["customer_id"],
+            "pb_id": data["pb_id"],
+            "old_limit": get_current_limit(data["customer_id"], data["pb_id"]),
+            "new_limit": data["new_limit"],
+            "vendor_id": data["vendor_id"],
+            "reason": data["reason"],
+            "version": get_next_version()
+        }
+        
+        # Update credit limit
+        success = update_credit_database(data["customer_id"], data["pb_id"], 
+                                       data["new_limit"], audit_record)
+        
+        if success:
+            # Notify all trading systems via WebSocket
+            notify_trading_systems({
+                "type": "CREDIT_UPDATE",
+                "customer_id": data["customer_id"],
+                "pb_id": data["pb_id"],
+                "new_limit": data["new_limit"]
+            })
+            
+            return jsonify({
+                "status": "success",
+                "audit_id": audit_record["version"],
+                "message": f"Credit limit updated to ${data['new_limit']:,}"
+            }), 200
+        else:
+            return jsonify({"error": "Failed to update credit limit"}), 500
+            
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/credit/status/<customer_id>/<pb_id>', methods=['GET'])
+def get_credit_status(customer_id, pb_id):
+    \"\"\"Get current credit limit and utilization\"\"\"
+    try:
+        current_limit = get_current_limit(customer_id, pb_id)
+        current_exposure = calculate_current_exposure(customer_id, pb_id)
+        utilization = (current_exposure / current_limit * 100) if current_limit > 0 else 0
+        
+        return jsonify({
+            "customer_id": customer_id,
+            "pb_id": pb_id,
+            "current_limit": current_limit,
+            "current_exposure": current_exposure,
+            "utilization_percent": round(utilization, 2),
+            "available_credit": current_limit - current_exposure,
+            "last_updated": get_last_update_time(customer_id, pb_id)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Usage example - updating credit limit
+update_data = {
+    "customer_id": "Cust_1",
+    "pb_id": "PB_A", 
+    "new_limit": 1500000,
+    "vendor_id": "RiskVendor_B",
+    "reason": "Improved credit rating"
+}
+
+response = requests.post('http://localhost:5000/api/credit/update', 
+                        json=update_data)
+print(f"Update result: {response.json()}")
+        """
+
+# Future Extensibility: Per-Instrument Credit Limits
+INSTRUMENT_LIMITS_CODE = """
+from collections import namedtuple
+from functools import lru_cache
+
+# Instrument categories, built once at import so category membership
+# tests are O(1) set lookups instead of list scans
+FX_MAJORS = frozenset({"EURUSD", "GBPUSD", "USDJPY", "USDCHF"})
+FX_MINORS = frozenset({"EURGBP", "EURJPY", "GBPJPY"})
+FX_EXOTICS = frozenset({"USDTRY", "USDZAR", "USDMXN"})
+
+# Extended credit data structure with per-instrument limits
+instrument_credit_config = {
+    "customer_id": "Cust_1",
+    "pb_id": "PB_A",
+    "aggregate_limit": 1000000,  # Overall limit
+    "instrument_limits": {
+        "categories": {
+            "FX_MAJORS": {
+                "limit": 800000,
+                "instruments": FX_MAJORS
+            },
+            "FX_MINORS": {
+                "limit": 150000,
+                "instruments": FX_MINORS
+            },
+            "FX_EXOTICS": {
+                "limit": 50000,
+                "instruments": FX_EXOTICS
+            }
+        },
+        "individual_overrides": {
+            "EURUSD": {"limit": 500000},  # Override within FX_MAJORS
+            "USDTRY": {"limit": 25000}    # Override within FX_EXOTICS
+        }
+    },
+    "concentration_limits": {
+        "max_single_instrument_pct": 60,  # Max 60% in any single instrument
+        "max_category_pct": 80             # Max 80% in any category
+    }
+}
+
+# Everything a trade check needs to know about one instrument
+InstrumentLimits = namedtuple("InstrumentLimits", "category category_limit instrument_limit")
+
+def flatten_instrument_limits(config):
+    \"\"\"Resolve every instrument's category and limits, with overrides applied\"\"\"
+    instrument_limits = config["instrument_limits"]
+    overrides = instrument_limits["individual_overrides"]
+    table = {}
+    for category, spec in instrument_limits["categories"].items():
+        for instrument in spec["instruments"]:
+            override = overrides.get(instrument)
+            table[instrument] = InstrumentLimits(
+                category=category,
+                category_limit=spec["limit"],
+                instrument_limit=override["limit"] if override else spec["limit"]
+            )
+    return table
+
+@lru_cache(maxsize=None)
+def get_instrument_limit_table(customer_id, pb_id):
+    \"\"\"Flattened instrument limits, built once per customer/PB config\"\"\"
+    return flatten_instrument_limits(get_instrument_credit_config(customer_id, pb_id))
+
+class Positions:
+    \"\"\"Positions per instrument, with the overall and per-category totals kept
+    up to date as trades are applied rather than re-summed for every check\"\"\"
+    __slots__ = ('limit_table', 'by_instrument', 'by_category', 'total')
+
+    def __init__(self, limit_table, positions=None):
+        self.limit_table = limit_table
+        self.by_instrument = {}
+        self.by_category = {}
+        self.total = 0
+        for instrument, amount in (positions or {}).items():
+            self.apply(instrument, amount)
+
+    def apply(self, instrument, delta):
+        \"\"\"Record an executed trade\"\"\"
+        self.by_instrument[instrument] = self.by_instrument.get(instrument, 0) + delta
+        self.total += delta
+        limits = self.limit_table.get(instrument)
+        if limits:
+            self.by_category[limits.category] = self.by_category.get(limits.category, 0) + delta
+
+def validate_instrument_trade(customer_id, pb_id, instrument, notional, positions, explain=False):
+    \"\"\"Validate trade against per-instrument credit limits.
+
+    Returns whether the trade is allowed; with explain=True, returns the
+    per-check breakdown instead.
+    \"\"\"
+    config = get_instrument_credit_config(customer_id, pb_id)
+    
+    # Get instrument category and limits (a single lookup in the flattened table)
+    limits = get_instrument_limit_table(customer_id, pb_id)[instrument]
+    category = limits.category
+    instrument_limit = limits.instrument_limit
+    category_limit = limits.category_limit
+    aggregate_limit = config["aggregate_limit"]
+    max_instrument_pct = config["concentration_limits"]["max_single_instrument_pct"]
+    
+    # Calculate exposures after the trade
+    new_instrument_exposure = positions.by_instrument.get(instrument, 0) + notional
+    new_category_exposure = positions.by_category.get(category, 0) + notional
+    new_total_exposure = positions.total + notional
+    
+    # Fast path for the trading gateway: stop at the first failed check, tightest limits first
+    if not explain:
+        if new_instrument_exposure > instrument_limit:
+            return False
+        if new_category_exposure > category_limit:
+            return False
+        if new_total_exposure > aggregate_limit:
+            return False
+        return new_instrument_exposure * 100 <= max_instrument_pct * aggregate_limit
+    
+    # Check limits
+    instrument_pct = new_instrument_exposure / aggregate_limit * 100
+    aggregate_ok = new_total_exposure <= aggregate_limit
+    instrument_ok = new_instrument_exposure <= instrument_limit
+    category_ok = new_category_exposure <= category_limit
+    concentration_ok = instrument_pct <= max_instrument_pct
+    trade_allowed = aggregate_ok & instrument_ok & category_ok & concentration_ok
+    
+    return {
+        "trade_allowed": trade_allowed,
+        "checks": {
+            "aggregate_limit": {
+                "current": new_total_exposure,
+                "limit": aggregate_limit,
+                "passed": aggregate_ok
+            },
+            "instrument_limit": {
+                "current": new_instrument_exposure,
+                "limit": instrument_limit,
+                "passed": instrument_ok
+            },
+            "category_limit": {
+                "current": new_category_exposure,
+                "limit": category_limit,
+                "passed": category_ok
+            },
+            "concentration_check": {
+                "instrument_pct": instrument_pct,
+                "max_pct": max_instrument_pct,
+                "passed": concentration_ok
+            }
+        },
+        "instrument": instrument,
+        "category": category,
+        "notional": notional
+    }
+
+# Usage example
+positions = Positions(get_instrument_limit_table("Cust_1", "PB_A"), {
+    "EURUSD": 300000,
+    "GBPUSD": 200000,
+    "USDJPY": 150000
+})
+
+trade_allowed = validate_instrument_trade("Cust_1", "PB_A", "EURUSD", 250000, positions)
+print(f"Trade allowed: {trade_allowed}")
+if trade_allowed:
+    positions.apply("EURUSD", 250000)
+
+# Breakdown of each check, e.g. for a rejection message
+result = validate_instrument_trade("Cust_1", "PB_A", "EURUSD", 250000, positions, explain=True)
+for check_name, check_result in result['checks'].items():
+    status = 'PASS' if check_result['passed'] else 'FAIL'
+    if check_name == "concentration_check":
+        print(f"{check_name}: {check_result['instrument_pct']:.1f}% / {check_result['max_pct']}% - {status}")
+    else:
+        print(f"{check_name}: {check_result['current']:,} / {check_result['limit']:,} - {status}")
+        """